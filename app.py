@@ -1,4 +1,5 @@
 from configparser import ConfigParser
+from copy import deepcopy
 from pathlib import Path
 from typing import Any
 from typing import Dict
@@ -24,7 +25,7 @@ def main(
 ):
     st.header("Welcome to the Dublin Retrofitting Tool")
 
-    small_area_boundaries = io.load_small_area_boundaries(
+    small_area_boundaries, small_area_index = io.load_small_area_boundaries(
         url=config["urls"]["small_area_boundaries"], data_dir=data_dir
     )
 
@@ -36,7 +37,9 @@ def main(
             default=["A", "B", "C", "D", "E", "F", "G"],
         )
         selected_small_areas = mapselect(
-            column_name="small_area", boundaries=small_area_boundaries
+            column_name="small_area",
+            boundaries=small_area_boundaries,
+            spatial_index=small_area_index,
         )
         retrofit_selections = _retrofitselect(defaults)
         inputs_are_submitted = st.form_submit_button(label="Submit")
@@ -67,49 +70,54 @@ def main(
 
 
 def _retrofitselect(defaults: DeaSelection) -> DeaSelection:
-    selections = defaults.copy()
-    for component, properties in defaults.items():
-        with st.beta_expander(label=f"Change {component} defaults"):
-            selections[component]["uvalue"]["target"] = st.number_input(
-                label="Threshold U-Value [W/m²K] - assume no retrofits below this value",
-                min_value=float(0),
-                value=properties["uvalue"]["target"],
-                key=component + "_threshold",
-                step=0.05,
-            )
-            c1, c2 = st.beta_columns(2)
-            selections[component]["cost"]["lower"] = c1.number_input(
-                label="Lowest* Likely Cost [€/m²]",
-                min_value=0,
-                value=properties["cost"]["lower"],
-                key=component + "_cost_lower",
-                step=5,
-            )
-            selections[component]["cost"]["upper"] = c2.number_input(
-                label="Highest** Likely Cost [€/m²]",
-                min_value=0,
-                value=properties["cost"]["upper"],
-                key=component + "_cost_upper",
-                step=5,
-            )
-            footnote = f"""
-                <small> * {properties["typical_area"] * properties["cost"]["lower"]}€
-                for a typical {component} area of {properties["typical_area"]}m²<br>
-                ** {properties["typical_area"]  * properties["cost"]["upper"]}€
-                for a typical {component} area of {properties["typical_area"]}m²</small>
-                """
-            st.markdown(footnote, unsafe_allow_html=True)
-
-        selections[component]["percentage_selected"] = st.slider(
-            f"""% of viable {component}s retrofitted to U-Value =
-            {selections[component]['uvalue']['target']} [W/m²K]""",
-            min_value=0.0,
-            max_value=1.0,
-            value=0.0,
-            key=component + "_percentage",
+    return {
+        component: _read_retrofit_params(component=component, properties=properties)
+        for component, properties in defaults.items()
+    }
+
+
+def _read_retrofit_params(component: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    params = deepcopy(properties)
+    with st.beta_expander(label=f"Change {component} defaults"):
+        params["uvalue"]["target"] = st.number_input(
+            label="Threshold U-Value [W/m²K] - assume no retrofits below this value",
+            min_value=float(0),
+            value=properties["uvalue"]["target"],
+            key=component + "_threshold",
+            step=0.05,
         )
-
-    return selections
+        c1, c2 = st.beta_columns(2)
+        params["cost"]["lower"] = c1.number_input(
+            label="Lowest* Likely Cost [€/m²]",
+            min_value=0,
+            value=properties["cost"]["lower"],
+            key=component + "_cost_lower",
+            step=5,
+        )
+        params["cost"]["upper"] = c2.number_input(
+            label="Highest** Likely Cost [€/m²]",
+            min_value=0,
+            value=properties["cost"]["upper"],
+            key=component + "_cost_upper",
+            step=5,
+        )
+        footnote = f"""
+            <small> * {properties["typical_area"] * properties["cost"]["lower"]}€
+            for a typical {component} area of {properties["typical_area"]}m²<br>
+            ** {properties["typical_area"]  * properties["cost"]["upper"]}€
+            for a typical {component} area of {properties["typical_area"]}m²</small>
+            """
+        st.markdown(footnote, unsafe_allow_html=True)
+
+    params["percentage_selected"] = st.slider(
+        f"""% of viable {component}s retrofitted to U-Value =
+        {params['uvalue']['target']} [W/m²K]""",
+        min_value=0.0,
+        max_value=1.0,
+        value=0.0,
+        key=component + "_percentage",
+    )
+    return params
 
 
 if __name__ == "__main__":
@@ -2,23 +2,36 @@ from typing import Any
 from typing import Dict
 from typing import List
 
+import numpy as np
 import pandas as pd
 
+_BER_LEVELS = ["A", "B", "C", "D", "E", "F", "G"]
 
-def _filter_by_substrings(
-    df: pd.DataFrame,
-    column_name: str,
-    selected_substrings: List[str],
-    all_substrings: List[str],
-) -> pd.DataFrame:
-    if len(selected_substrings) == len(all_substrings):
-        selected_df = df
+
+def _get_ber_level_mask(
+    energy_ratings: pd.Series, selected_levels: List[str]
+) -> np.ndarray:
+    if len(selected_levels) == len(_BER_LEVELS):
+        is_selected = np.ones(len(energy_ratings), dtype=bool)
     else:
-        substrings_to_search = "|".join(selected_substrings)
-        selected_df = df[
-            df[column_name].str.title().str.contains(substrings_to_search, regex=True)
-        ]
-    return selected_df
+        ratings = energy_ratings.astype("category")
+        # look up each level by category code, the trailing "" catches code -1 (NaN)
+        levels_by_code = np.append(
+            ratings.cat.categories.astype(str).str[0].str.upper(), ""
+        )
+        levels = levels_by_code[ratings.cat.codes.to_numpy()]
+        is_selected = np.isin(levels, selected_levels)
+    return is_selected
+
+
+def _get_small_area_mask(
+    small_areas: pd.Series, selected_small_areas: List[str]
+) -> np.ndarray:
+    small_areas = small_areas.astype("category")
+    selected_codes = small_areas.cat.categories.get_indexer(selected_small_areas)
+    return np.isin(
+        small_areas.cat.codes.to_numpy(), selected_codes[selected_codes != -1]
+    )
 
 
 def get_selected_buildings(
@@ -26,29 +39,22 @@ def get_selected_buildings(
     selected_energy_ratings: List[str],
     selected_small_areas: List[str],
 ) -> pd.DataFrame:
-    filtered_buildings = (
-        buildings.pipe(
-            _filter_by_substrings,
-            column_name="energy_rating",
-            selected_substrings=selected_energy_ratings,
-            all_substrings=["A", "B", "C", "D", "E", "F", "G"],
-        )
-        .pipe(
-            _filter_by_substrings,
-            column_name="small_area",
-            selected_substrings=selected_small_areas,
-            all_substrings=buildings["small_area"],
-        )
-        .reset_index(drop=True)
+    is_selected = _get_ber_level_mask(
+        buildings["energy_rating"], selected_levels=selected_energy_ratings
+    ) & _get_small_area_mask(
+        buildings["small_area"], selected_small_areas=selected_small_areas
+    )
+    filtered_buildings = buildings.iloc[np.flatnonzero(is_selected)].reset_index(
+        drop=True
     )
     if filtered_buildings.empty:
         raise ValueError(
             f"""
             There are no buildings meeting your criteria:
 
-            energy_rating: {selections["energy_rating"]}
+            energy_rating: {selected_energy_ratings}
 
-            small_area: {selections["small_area"]}
+            small_area: {selected_small_areas}
             """
         )
     else:
@@ -1,15 +1,51 @@
 from pathlib import Path
 from typing import Callable
 from typing import List
+from typing import Tuple
 
 import fsspec
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+from pyarrow import feather
+import shapely
 import streamlit as st
 
 from dea import filter
 from dea import retrofit
 
+_BER_COLUMNS = [
+    "small_area",
+    "energy_rating",
+    "energy_value",
+    "heat_loss_parameter",
+    "ground_floor_area",
+    "first_floor_area",
+    "second_floor_area",
+    "third_floor_area",
+    "roof_area",
+    "roof_uvalue",
+    "wall_area",
+    "wall_uvalue",
+    "floor_area",
+    "floor_uvalue",
+    "window_area",
+    "window_uvalue",
+    "door_area",
+    "door_uvalue",
+]
+_BER_DTYPES = {
+    **{c: "float32" for c in _BER_COLUMNS if c.endswith(("_area", "_uvalue"))},
+    "small_area": "category",
+    "energy_rating": "category",
+}
+_FLOOR_AREA_COLUMNS = [
+    "ground_floor_area",
+    "first_floor_area",
+    "second_floor_area",
+    "third_floor_area",
+]
+
 
 def _load(read: Callable, url: str, data_dir: Path, filesystem_name: str):
     filename = url.split("/")[-1]
@@ -23,25 +59,54 @@ def _load(read: Callable, url: str, data_dir: Path, filesystem_name: str):
     return df
 
 
-@st.cache
-def load_small_area_boundaries(url: str, data_dir: Path) -> gpd.GeoDataFrame:
-    return _load(
+@st.cache(allow_output_mutation=True)
+def load_small_area_boundaries(
+    url: str, data_dir: Path, epsg: str = "3857"
+) -> Tuple[gpd.GeoDataFrame, shapely.STRtree]:
+    boundaries = _load(
         read=gpd.read_parquet, url=url, data_dir=data_dir, filesystem_name="s3"
+    ).to_crs(epsg=epsg)
+    spatial_index = shapely.STRtree(boundaries.geometry.values)
+    return boundaries, spatial_index
+
+
+def _read_buildings(f) -> pd.DataFrame:
+    return pd.read_parquet(f, columns=_BER_COLUMNS, engine="pyarrow").astype(
+        _BER_DTYPES
     )
 
 
-def _load_buildings(url: str, data_dir: Path):
-    return _load(read=pd.read_parquet, url=url, data_dir=data_dir, filesystem_name="s3")
+def _has_expected_schema(buildings: pd.DataFrame) -> bool:
+    return list(buildings.columns) == _BER_COLUMNS and all(
+        buildings[c].dtype == dtype for c, dtype in _BER_DTYPES.items()
+    )
+
+
+@st.cache
+def _load_buildings(url: str, data_dir: Path) -> pd.DataFrame:
+    # an uncompressed feather copy can be memory-mapped on every subsequent load
+    filepath = data_dir / (Path(url.split("/")[-1]).stem + ".feather")
+    if filepath.exists():
+        buildings = feather.read_feather(filepath, memory_map=True)
+        if _has_expected_schema(buildings):
+            return buildings
+    # use a local parquet if one exists but don't cache another copy beside the feather
+    parquet_filepath = data_dir / url.split("/")[-1]
+    if parquet_filepath.exists():
+        buildings = _read_buildings(parquet_filepath)
+    else:
+        with fsspec.filesystem("s3").open(url) as f:
+            buildings = _read_buildings(f)
+    feather.write_feather(buildings, filepath, compression="uncompressed")
+    return feather.read_feather(filepath, memory_map=True)
 
 
 def _add_retrofit_columns(buildings: pd.DataFrame) -> pd.DataFrame:
-    buildings["total_floor_area"] = (
-        buildings["ground_floor_area"]
-        + buildings["first_floor_area"]
-        + buildings["second_floor_area"]
-        + buildings["third_floor_area"]
+    floor_areas = buildings[_FLOOR_AREA_COLUMNS].to_numpy(dtype=np.float32)
+    buildings_with_floor_area = buildings.assign(
+        total_floor_area=floor_areas.sum(axis=1)
     )
-    return retrofit.calculate_fabric_heat_loss(buildings)
+    return retrofit.calculate_fabric_heat_loss(buildings_with_floor_area)
 
 
 @st.cache
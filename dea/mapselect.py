@@ -1,6 +1,7 @@
-import json
 from typing import List
+from typing import Optional
 
+from bokeh import events
 from bokeh.models.plots import Plot
 from bokeh.plotting import figure
 from bokeh.plotting import Figure
@@ -10,37 +11,51 @@ from bokeh.models import GeoJSONDataSource
 from bokeh.tile_providers import CARTODBPOSITRON
 from bokeh.tile_providers import get_provider
 import geopandas as gpd
+import icontract
+import numpy as np
 import pandas as pd
+import shapely
 import streamlit as st
 from streamlit_bokeh_events import streamlit_bokeh_events
 
+_PLOT_SIZE_PX = 500
+
 
 @st.cache
-def _convert_gdf_geometry_to_xy(gdf: gpd.GeoDataFrame, epsg: str) -> gpd.GeoDataFrame:
-    return (
-        gdf.to_crs(epsg=epsg)
-        .assign(
-            x=lambda gdf: gdf.geometry.centroid.x, y=lambda gdf: gdf.geometry.centroid.y
-        )
-        .drop(columns="geometry")
+def _convert_gdf_geometry_to_xy(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    centroids = shapely.centroid(gdf.geometry.values)
+    return gdf.assign(x=shapely.get_x(centroids), y=shapely.get_y(centroids)).drop(
+        columns="geometry"
     )
 
 
+def _get_metres_per_pixel(gdf: gpd.GeoDataFrame, size_px: int) -> float:
+    minx, miny, maxx, maxy = gdf.total_bounds
+    return max(maxx - minx, maxy - miny) / size_px
+
+
 @st.cache
-def _convert_gdf_to_geojson_str(
-    gdf: gpd.GeoDataFrame, epsg: str, tolerance_m: int = 50
-) -> str:
-    boundaries = gdf.to_crs(epsg=epsg).geometry.simplify(tolerance_m)
-    return json.dumps(json.loads(boundaries.to_json()))
+def _convert_gdf_to_geojson_str(gdf: gpd.GeoDataFrame, size_px: int) -> str:
+    # detail finer than a pixel at the initial extent can't be seen so don't send it
+    tolerance_m = _get_metres_per_pixel(gdf, size_px=size_px)
+    simplified = shapely.simplify(np.asarray(gdf.geometry.values), tolerance_m)
+    # missing geometries become null like GeoSeries.to_json
+    features = ",".join(
+        '{"type": "Feature", "properties": {}, "geometry": '
+        + (geometry if geometry is not None else "null")
+        + "}"
+        for geometry in shapely.to_geojson(simplified)
+    )
+    return '{"type": "FeatureCollection", "features": [' + features + "]}"
 
 
-def _plot_basemap(boundaries: gpd.GeoDataFrame, epsg: str):
-    geojson_str = _convert_gdf_to_geojson_str(boundaries, epsg=epsg)
+def _plot_basemap(boundaries: gpd.GeoDataFrame):
+    geojson_str = _convert_gdf_to_geojson_str(boundaries, size_px=_PLOT_SIZE_PX)
     gds_polygons = GeoJSONDataSource(geojson=geojson_str)
     plot = figure(
         tools="pan, zoom_in, zoom_out, box_zoom, wheel_zoom, lasso_select",
-        width=500,
-        height=500,
+        width=_PLOT_SIZE_PX,
+        height=_PLOT_SIZE_PX,
     )
     tile_provider = get_provider(CARTODBPOSITRON)
     plot.add_tile(tile_provider)
@@ -57,14 +72,22 @@ def _plot_basemap(boundaries: gpd.GeoDataFrame, epsg: str):
 
 def _plot_points(plot: Plot, points: pd.DataFrame) -> Figure:
     cds_lasso = ColumnDataSource(points)
-    cds_lasso.selected.js_on_change(
-        "indices",
+    plot.js_on_event(
+        events.SelectionGeometry,
         CustomJS(
             args=dict(source=cds_lasso),
             code="""
-            document.dispatchEvent(
-                new CustomEvent("LASSO_SELECT", {detail: {data: source.selected.indices}})
-            )
+            if (cb_obj.final) {
+                const polygon = {
+                    x: Array.from(cb_obj.geometry.x), y: Array.from(cb_obj.geometry.y)
+                }
+                document.dispatchEvent(
+                    new CustomEvent(
+                        "LASSO_SELECT",
+                        {detail: {data: source.selected.indices, polygon: polygon}}
+                    )
+                )
+            }
             """,
         ),
     )
@@ -73,7 +96,10 @@ def _plot_points(plot: Plot, points: pd.DataFrame) -> Figure:
 
 
 def _get_points_on_selection(
-    column_name: str, bokeh_plot: Plot, points: gpd.GeoDataFrame
+    column_name: str,
+    bokeh_plot: Plot,
+    points: gpd.GeoDataFrame,
+    spatial_index: Optional[shapely.STRtree] = None,
 ) -> List[str]:
     lasso_selected = streamlit_bokeh_events(
         bokeh_plot=bokeh_plot,
@@ -84,36 +110,54 @@ def _get_points_on_selection(
     )
     if lasso_selected:
         try:
-            indices_selected = lasso_selected.get("LASSO_SELECT")["data"]
+            selection = lasso_selected.get("LASSO_SELECT")
+            indices_selected = selection["data"]
         except:
             raise ValueError(f"No '{column_name}' selected!")
+        polygon = selection.get("polygon")
+        # a quick flick can end the lasso with too few vertices to form a polygon
+        if spatial_index is not None and polygon and len(polygon["x"]) >= 3:
+            lasso = shapely.make_valid(shapely.Polygon(zip(polygon["x"], polygon["y"])))
+            indices_selected = np.sort(
+                spatial_index.query(lasso, predicate="intersects")
+            )
         points_selected = points.iloc[indices_selected][column_name]
     else:
         points_selected = points[column_name]
     return points_selected.to_list()
 
 
+@icontract.require(lambda boundaries, epsg: boundaries.crs.to_epsg() == int(epsg))
 def mapselect(
-    column_name: str, boundaries: gpd.GeoDataFrame, epsg: str = "3857"
+    column_name: str,
+    boundaries: gpd.GeoDataFrame,
+    epsg: str = "3857",
+    spatial_index: Optional[shapely.STRtree] = None,
 ) -> List[str]:
     """Select Polygons on a map corresponding to column_name.
 
     Args:
         column_name (str): Column in boundaries to be filtered by map selection
-        boundaries (gpd.GeoDataFrame): Boundaries to be mapped
+        boundaries (gpd.GeoDataFrame): Boundaries to be mapped, already in epsg
         epsg (str, optional):  EPSG registry. CARTODBPOSITRON tile requires epsg=3857.
             Defaults to "3857".
+        spatial_index (shapely.STRtree, optional): Index of boundaries' geometries in
+            epsg, used to select the Polygons intersecting the lasso. Defaults to None,
+            in which case the Polygons whose centroids are lassoed are selected.
 
     Returns:
         List[str]: Polygons selected
     """
     st.subheader(f"Filter by {column_name}")
     st.markdown("> Click on the `Lasso Select` tool on the toolbar below!")
-    points = _convert_gdf_geometry_to_xy(boundaries, epsg=epsg)
-    basemap = _plot_basemap(boundaries, epsg=epsg)
+    points = _convert_gdf_geometry_to_xy(boundaries)
+    basemap = _plot_basemap(boundaries)
     pointmap = _plot_points(plot=basemap, points=points)
     points_selected = _get_points_on_selection(
-        column_name=column_name, bokeh_plot=pointmap, points=points
+        column_name=column_name,
+        bokeh_plot=pointmap,
+        points=points,
+        spatial_index=spatial_index,
     )
     with st.beta_expander(f"Show selected {column_name}"):
         st.write(str(points_selected))
@@ -59,13 +59,32 @@ def plot_heat_pump_viability_comparison(pre_vs_post_retrofit_hps: pd.DataFrame)
 
 
 def plot_retrofit_costs(post_retrofit: pd.DataFrame) -> None:
-    cost_columns = [c for c in post_retrofit.columns if "cost" in c]
-    costs = (
-        post_retrofit[cost_columns]
-        .sum()
-        .divide(1e6)
-        .round(2)
-        .rename("M€")
-        .reset_index()
+    components = [
+        c[: -len("_cost_lower")]
+        for c in post_retrofit.columns
+        if c.endswith("_cost_lower")
+    ]
+    component_costs = np.column_stack(
+        [
+            np.nansum(
+                post_retrofit[[c + "_cost_lower" for c in components]].to_numpy(
+                    dtype=np.float64
+                ),
+                axis=0,
+            ),
+            np.nansum(
+                post_retrofit[[c + "_cost_upper" for c in components]].to_numpy(
+                    dtype=np.float64
+                ),
+                axis=0,
+            ),
+        ]
+    )
+    costs = np.vstack([component_costs, component_costs.sum(axis=0)]) / 1e6
+    st.write(
+        pd.DataFrame(
+            costs.round(2),
+            index=[c.title() for c in components] + ["Total"],
+            columns=["Lowest Likely Cost [M€]", "Highest Likely Cost [M€]"],
+        )
     )
-    st.write(costs)
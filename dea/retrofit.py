@@ -1,76 +1,143 @@
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Tuple
 
 import icontract
 import numpy as np
 import pandas as pd
-from rcbm import fab
 from rcbm import htuse
 from rcbm import vent
+import streamlit as st
+
+_FABRIC_COMPONENTS = ["roof", "wall", "floor", "window", "door"]
+_FABRIC_AREA_COLUMNS = [c + "_area" for c in _FABRIC_COMPONENTS]
+_FABRIC_UVALUE_COLUMNS = [c + "_uvalue" for c in _FABRIC_COMPONENTS]
+_BER_RATING_BINS = np.array(
+    [25, 50, 75, 100, 125, 150, 175, 200, 225, 260, 300, 340, 380, 450],
+    dtype="float64",
+)
+_BER_RATING_LABELS = [
+    "A1",
+    "A2",
+    "A3",
+    "B1",
+    "B2",
+    "B3",
+    "C1",
+    "C2",
+    "C3",
+    "D1",
+    "D2",
+    "E1",
+    "E2",
+    "F",
+    "G",
+]
 
 
 def _get_viable_buildings(
-    uvalues: pd.DataFrame,
+    uvalues: np.ndarray,
     threshold_uvalue: float,
     percentage_selected: float,
-    random_seed: int = 42,
-) -> pd.Series:
-    where_uvalue_is_over_threshold = uvalues > threshold_uvalue
-    subset_over_threshold = uvalues[where_uvalue_is_over_threshold].sample(
-        frac=percentage_selected, random_state=random_seed
-    )
-    return uvalues.index.isin(subset_over_threshold.index)
+    random_order: np.ndarray,
+) -> np.ndarray:
+    where_uvalue_is_over_threshold = np.flatnonzero(uvalues > threshold_uvalue)
+    no_over_threshold = where_uvalue_is_over_threshold.size
+    no_selected = int(round(percentage_selected * no_over_threshold))
+    # the first no_selected positions of a shared random order that fall in range
+    positions_selected = random_order[random_order < no_over_threshold][:no_selected]
+    is_selected = np.zeros(len(uvalues), dtype=bool)
+    is_selected[where_uvalue_is_over_threshold[positions_selected]] = True
+    return is_selected
 
 
 def _estimate_cost_of_fabric_retrofits(
-    is_selected: pd.Series,
+    is_selected: np.ndarray,
     cost: float,
-    areas: pd.Series,
-) -> pd.Series:
-    return pd.Series([cost] * is_selected * areas, dtype="int64")
+    areas: np.ndarray,
+) -> np.ndarray:
+    costs = np.zeros_like(areas)
+    costs[is_selected] = areas[is_selected] * np.float32(cost)
+    return costs
+
+
+def _retrofit_fabric_component(
+    uvalues: np.ndarray,
+    areas: np.ndarray,
+    properties: Dict[str, Any],
+    random_order: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    is_selected = _get_viable_buildings(
+        uvalues=uvalues,
+        threshold_uvalue=properties["uvalue"]["threshold"],
+        percentage_selected=properties["percentage_selected"],
+        random_order=random_order,
+    )
+    # only the retrofitted rows' area * uvalue terms change, thermal bridging doesn't
+    fabric_heat_loss_improvement = areas[is_selected] * (
+        uvalues[is_selected] - np.float32(properties["uvalue"]["target"])
+    )
+    return {
+        "is_selected": is_selected,
+        "fabric_heat_loss_improvement": fabric_heat_loss_improvement,
+        "cost_lower": _estimate_cost_of_fabric_retrofits(
+            is_selected=is_selected, cost=properties["cost"]["lower"], areas=areas
+        ),
+        "cost_upper": _estimate_cost_of_fabric_retrofits(
+            is_selected=is_selected, cost=properties["cost"]["upper"], areas=areas
+        ),
+    }
 
 
 def retrofit_buildings(
     buildings: pd.DataFrame,
     selections: Dict[str, Any],
+    random_seed: int = 42,
 ) -> pd.DataFrame:
-    post_retrofit = buildings.copy()
+    # only return the columns changed by retrofitting rather than copying the stock
+    post_retrofit = {}
+    random_order = np.random.default_rng(random_seed).permutation(len(buildings))
+    fabric_heat_loss = buildings["fabric_heat_loss_w_per_k"].to_numpy(copy=True)
     for component, properties in selections.items():
-        where_is_viable_building = _get_viable_buildings(
-            uvalues=buildings[component + "_uvalue"],
-            threshold_uvalue=properties["uvalue"]["threshold"],
-            percentage_selected=properties["percentage_selected"],
-        )
-        post_retrofit.loc[where_is_viable_building, component + "_uvalue"] = properties[
-            "uvalue"
-        ]["target"]
-        post_retrofit[component + "_cost_lower"] = _estimate_cost_of_fabric_retrofits(
-            is_selected=where_is_viable_building,
-            cost=properties["cost"]["lower"],
-            areas=buildings[component + "_area"],
+        uvalues = buildings[component + "_uvalue"].to_numpy(dtype=np.float32)
+        component_retrofit = _retrofit_fabric_component(
+            uvalues=uvalues,
+            areas=buildings[component + "_area"].to_numpy(dtype=np.float32),
+            properties=properties,
+            random_order=random_order,
         )
-        post_retrofit[component + "_cost_upper"] = _estimate_cost_of_fabric_retrofits(
-            is_selected=where_is_viable_building,
-            cost=properties["cost"]["upper"],
-            areas=buildings[component + "_area"],
+        where_is_viable_building = component_retrofit["is_selected"]
+        fabric_heat_loss[where_is_viable_building] -= component_retrofit[
+            "fabric_heat_loss_improvement"
+        ]
+        post_retrofit[component + "_uvalue"] = np.where(
+            where_is_viable_building,
+            np.float32(properties["uvalue"]["target"]),
+            uvalues,
         )
-    return calculate_fabric_heat_loss(post_retrofit)
-
-
-def calculate_fabric_heat_loss(buildings: pd.DataFrame) -> pd.Series:
-    buildings["fabric_heat_loss_w_per_k"] = fab.calculate_fabric_heat_loss(
-        roof_area=buildings["roof_area"],
-        roof_uvalue=buildings["roof_uvalue"],
-        wall_area=buildings["wall_area"],
-        wall_uvalue=buildings["wall_uvalue"],
-        floor_area=buildings["floor_area"],
-        floor_uvalue=buildings["floor_uvalue"],
-        window_area=buildings["window_area"],
-        window_uvalue=buildings["window_uvalue"],
-        door_area=buildings["door_area"],
-        door_uvalue=buildings["door_uvalue"],
-        thermal_bridging_factor=0.05,
+        post_retrofit[component + "_cost_lower"] = component_retrofit["cost_lower"]
+        post_retrofit[component + "_cost_upper"] = component_retrofit["cost_upper"]
+    post_retrofit["fabric_heat_loss_w_per_k"] = fabric_heat_loss
+    post_retrofit = pd.DataFrame(post_retrofit, index=buildings.index)
+    post_retrofit["fabric_heat_loss_kwh_per_y"] = htuse.calculate_heat_loss_per_year(
+        post_retrofit["fabric_heat_loss_w_per_k"]
+    )
+    return post_retrofit
+
+
+def _calculate_fabric_heat_loss_w_per_k(
+    areas: np.ndarray, uvalues: np.ndarray, thermal_bridging_factor: float = 0.05
+) -> np.ndarray:
+    # sum(area * uvalue) + thermal_bridging_factor * sum(area) in one pass
+    return (areas * (uvalues + np.float32(thermal_bridging_factor))).sum(axis=1)
+
+
+def calculate_fabric_heat_loss(buildings: pd.DataFrame) -> pd.DataFrame:
+    areas = buildings[_FABRIC_AREA_COLUMNS].to_numpy(dtype=np.float32)
+    uvalues = buildings[_FABRIC_UVALUE_COLUMNS].to_numpy(dtype=np.float32)
+    buildings["fabric_heat_loss_w_per_k"] = _calculate_fabric_heat_loss_w_per_k(
+        areas=areas, uvalues=uvalues, thermal_bridging_factor=0.05
     )
     buildings["fabric_heat_loss_kwh_per_y"] = htuse.calculate_heat_loss_per_year(
         buildings["fabric_heat_loss_w_per_k"]
@@ -79,119 +146,109 @@ def calculate_fabric_heat_loss(buildings: pd.DataFrame) -> pd.Series:
 
 
 def _get_ber_rating(energy_values: pd.Series) -> pd.Series:
-    return (
-        pd.cut(
-            energy_values,
-            [
-                -np.inf,
-                25,
-                50,
-                75,
-                100,
-                125,
-                150,
-                175,
-                200,
-                225,
-                260,
-                300,
-                340,
-                380,
-                450,
-                np.inf,
-            ],
-            labels=[
-                "A1",
-                "A2",
-                "A3",
-                "B1",
-                "B2",
-                "B3",
-                "C1",
-                "C2",
-                "C3",
-                "D1",
-                "D2",
-                "E1",
-                "E2",
-                "F",
-                "G",
-            ],
-        )
-        .rename("energy_rating")
-        .astype("string")
-    )  # streamlit & altair don't recognise category
+    values = energy_values.to_numpy(dtype="float64")
+    # bins are closed on the right so values on an edge fall into the lower rating
+    codes = np.searchsorted(_BER_RATING_BINS, values, side="left")
+    codes[np.isnan(values)] = -1
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=_BER_RATING_LABELS),
+        index=energy_values.index,
+        name="energy_rating",
+    )
+
+
+def _hash_series(series: pd.Series) -> Tuple[Any, bytes]:
+    return series.name, series.to_numpy().tobytes()
+
+
+def _get_size_of_category(category: pd.Series) -> pd.Series:
+    return category.groupby(category, observed=True).size().sort_index()
+
+
+@st.cache(hash_funcs={pd.Series: _hash_series})
+def _get_ber_rating_breakdown(energy_values: pd.Series) -> pd.Series:
+    return _get_size_of_category(_get_ber_rating(energy_values))
 
 
 @icontract.ensure(
     lambda result, column: np.array_equal(result.columns, [column, "category", "total"])
 )
 def _get_size_of_pre_vs_post_category(
-    pre_retrofit_category: pd.Series, post_retrofit_category: pd.Series, column: str
+    pre_retrofit_size: pd.Series, post_retrofit_size: pd.Series, column: str
 ) -> pd.DataFrame:
-    return (
-        pd.concat(
-            [
-                pre_retrofit_category.to_frame().assign(category="Pre"),
-                post_retrofit_category.to_frame().assign(category="Post"),
-            ]
-        )
-        .groupby([column, "category"])
-        .size()
-        .rename("total")
-        .reset_index()
+    return pd.DataFrame(
+        {
+            column: np.concatenate(
+                [
+                    pre_retrofit_size.index.to_numpy(),
+                    post_retrofit_size.index.to_numpy(),
+                ]
+            ),
+            "category": np.repeat(
+                ["Pre", "Post"], [len(pre_retrofit_size), len(post_retrofit_size)]
+            ),
+            "total": np.concatenate(
+                [pre_retrofit_size.to_numpy(), post_retrofit_size.to_numpy()]
+            ),
+        }
     )
 
 
 def calculate_ber_improvement(
     pre_retrofit: pd.DataFrame, post_retrofit: pd.DataFrame
 ) -> pd.Series:
-    energy_value_improvement = (
-        pre_retrofit["fabric_heat_loss_kwh_per_y"]
-        - post_retrofit["fabric_heat_loss_kwh_per_y"]
-    ) / pre_retrofit["total_floor_area"]
-    pre_retrofit_bers = _get_ber_rating(pre_retrofit["energy_value"])
-    post_retrofit_bers = _get_ber_rating(
-        pre_retrofit["energy_value"] - energy_value_improvement.fillna(0)
+    heat_loss_improvement = (
+        pre_retrofit["fabric_heat_loss_kwh_per_y"].to_numpy()
+        - post_retrofit["fabric_heat_loss_kwh_per_y"].to_numpy()
+    )
+    energy_value_improvement = np.divide(
+        heat_loss_improvement,
+        pre_retrofit["total_floor_area"].to_numpy(),
+        out=heat_loss_improvement,
+    )
+    energy_value_improvement[np.isnan(energy_value_improvement)] = 0
+    pre_retrofit_size = _get_ber_rating_breakdown(pre_retrofit["energy_value"])
+    post_retrofit_size = _get_ber_rating_breakdown(
+        pre_retrofit["energy_value"] - energy_value_improvement
     )
     return _get_size_of_pre_vs_post_category(
-        pre_retrofit_category=pre_retrofit_bers,
-        post_retrofit_category=post_retrofit_bers,
+        pre_retrofit_size=pre_retrofit_size,
+        post_retrofit_size=post_retrofit_size,
         column="energy_rating",
-    )
+    ).astype(
+        {"energy_rating": "string"}
+    )  # streamlit & altair don't recognise category
 
 
-def _bin_viable_for_heat_pumps(heat_loss_parameter):
-    return (
-        pd.cut(
-            heat_loss_parameter,
-            bins=[-np.inf, 2.3, np.inf],
-            labels=[True, False],
-        )
-        .astype(bool)
-        .rename("is_viable_for_a_heat_pump")
-    )
+def _bin_viable_for_heat_pumps(heat_loss_parameter: pd.Series) -> pd.Series:
+    return (heat_loss_parameter <= 2.3).rename("is_viable_for_a_heat_pump")
+
+
+@st.cache(hash_funcs={pd.Series: _hash_series})
+def _get_heat_pump_viability_breakdown(heat_loss_parameters: pd.Series) -> pd.Series:
+    return _get_size_of_category(_bin_viable_for_heat_pumps(heat_loss_parameters))
 
 
 def calculate_heat_pump_viability_improvement(
     pre_retrofit: pd.DataFrame, post_retrofit: pd.DataFrame
 ) -> pd.Series:
-    pre_retrofit_viability = _bin_viable_for_heat_pumps(
-        pre_retrofit["heat_loss_parameter"]
-    )
     heat_loss_improvement = (
-        pre_retrofit["fabric_heat_loss_w_per_k"]
-        - post_retrofit["fabric_heat_loss_w_per_k"]
+        pre_retrofit["fabric_heat_loss_w_per_k"].to_numpy()
+        - post_retrofit["fabric_heat_loss_w_per_k"].to_numpy()
+    )
+    post_retrofit_heat_loss_parameter = pre_retrofit["heat_loss_parameter"] - np.divide(
+        heat_loss_improvement,
+        pre_retrofit["total_floor_area"].to_numpy(),
+        out=heat_loss_improvement,
     )
-    post_retrofit_heat_loss_parameter = (
+    pre_retrofit_size = _get_heat_pump_viability_breakdown(
         pre_retrofit["heat_loss_parameter"]
-        - heat_loss_improvement / pre_retrofit["total_floor_area"]
     )
-    post_retrofit_viability = _bin_viable_for_heat_pumps(
+    post_retrofit_size = _get_heat_pump_viability_breakdown(
         post_retrofit_heat_loss_parameter
     )
     return _get_size_of_pre_vs_post_category(
-        pre_retrofit_category=pre_retrofit_viability,
-        post_retrofit_category=post_retrofit_viability,
+        pre_retrofit_size=pre_retrofit_size,
+        post_retrofit_size=post_retrofit_size,
         column="is_viable_for_a_heat_pump",
     )
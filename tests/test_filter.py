@@ -1,4 +1,3 @@
-import icontract
 import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
@@ -7,50 +6,39 @@ import pytest
 from dea import filter
 
 
-@pytest.mark.parametrize(
-    "bers,selected_postcodes,counties,expected_output",
-    [
-        (
-            pd.DataFrame({"countyname": ["DUBLIN 11", "CO. GALWAY", "CO. CORK"]}),
-            ["Dublin 11"],
-            ["Dublin", "Galway", "Cork"],
-            pd.DataFrame({"countyname": ["DUBLIN 11"]}),
-        ),
-        (
-            pd.DataFrame({"countyname": ["Dublin", "Galway", "Cork"]}),
-            ["Dublin", "Galway", "Cork"],
-            ["Dublin", "Galway", "Cork"],
-            pd.DataFrame(
-                {
-                    "countyname": ["Dublin", "Galway", "Cork"],
-                }
-            ),
-        ),
-    ],
-)
-def test_filter_by_substrings(
-    bers,
-    selected_postcodes,
-    counties,
-    expected_output,
-):
-    output = filter.filter_by_substrings(
-        df=bers,
-        column_name="countyname",
-        selected_substrings=selected_postcodes,
-        all_substrings=counties,
+def test_get_ber_level_mask():
+    energy_ratings = pd.Series(["A1", "B2", "G", np.nan])
+    expected_output = np.array([False, True, True, False])
+    output = filter._get_ber_level_mask(energy_ratings, selected_levels=["B", "G"])
+    np.testing.assert_array_equal(output, expected_output)
+
+
+def test_get_selected_buildings():
+    buildings = pd.DataFrame(
+        {
+            "energy_rating": ["A1", "B2", "G", "G"],
+            "small_area": pd.Categorical(["1", "2", "2", "3"]),
+        }
+    )
+    expected_output = pd.DataFrame(
+        {
+            "energy_rating": ["B2", "G"],
+            "small_area": pd.Categorical(["2", "2"], categories=["1", "2", "3"]),
+        }
+    )
+    output = filter.get_selected_buildings(
+        buildings=buildings,
+        selected_energy_ratings=["B", "G"],
+        selected_small_areas=["2", "4"],
     )
     assert_frame_equal(output, expected_output)
 
 
-def test_filter_by_substrings_raises_error_if_nan_values():
-    bers = pd.DataFrame({"countyname": [np.nan, "CO. GALWAY", "CO. CORK"]})
-    selected_substrings = ["Dublin 11"]
-    counties = ["Dublin", "Galway", "Cork"]
-    with pytest.raises(icontract.ViolationError):
-        filter.filter_by_substrings(
-            df=bers,
-            column_name="countyname",
-            selected_substrings=selected_substrings,
-            all_substrings=counties,
+def test_get_selected_buildings_raises_error_when_no_buildings():
+    buildings = pd.DataFrame({"energy_rating": ["A1"], "small_area": ["1"]})
+    with pytest.raises(ValueError):
+        filter.get_selected_buildings(
+            buildings=buildings,
+            selected_energy_ratings=["G"],
+            selected_small_areas=["1"],
         )
@@ -0,0 +1,59 @@
+import json
+
+import geopandas as gpd
+import pytest
+import shapely
+from shapely.geometry import box
+from shapely.geometry import shape
+
+from dea import mapselect
+
+
+@pytest.fixture
+def boundaries() -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        {"small_area": ["1", "2", "3"]},
+        geometry=[box(0, 0, 10, 10), box(10, 10, 20, 20), box(50, 50, 60, 60)],
+        crs="EPSG:3857",
+    )
+
+
+@pytest.mark.parametrize(
+    "polygon,expected_output",
+    [
+        ({"x": [5, 15, 15, 5], "y": [5, 5, 15, 15]}, ["1", "2"]),
+        ({"x": [10, 20], "y": [10, 10]}, ["3"]),
+        ({"x": [10], "y": [10]}, ["3"]),
+    ],
+)
+def test_get_points_on_selection_with_spatial_index(
+    monkeypatch, boundaries, polygon, expected_output
+):
+    monkeypatch.setattr(
+        mapselect,
+        "streamlit_bokeh_events",
+        lambda **kwargs: {"LASSO_SELECT": {"data": [2], "polygon": polygon}},
+    )
+    output = mapselect._get_points_on_selection(
+        column_name="small_area",
+        bokeh_plot=None,
+        points=boundaries.drop(columns="geometry"),
+        spatial_index=shapely.STRtree(boundaries.geometry.values),
+    )
+    assert output == expected_output
+
+
+def test_convert_gdf_to_geojson_str_keeps_missing_geometries():
+    boundaries = gpd.GeoDataFrame(
+        {"small_area": ["1", "2"]},
+        geometry=[box(0, 0, 500, 500), None],
+        crs="EPSG:3857",
+    )
+    output = json.loads(mapselect._convert_gdf_to_geojson_str(boundaries, size_px=500))
+    assert output["type"] == "FeatureCollection"
+    assert len(output["features"]) == 2
+    assert output["features"][0]["geometry"]["type"] == "Polygon"
+    assert shape(output["features"][0]["geometry"]).equals(
+        box(0, 0, 500, 500)
+    )
+    assert output["features"][1]["geometry"] is None
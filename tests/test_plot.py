@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from dea import plot
+
+
+def test_plot_retrofit_costs_skips_missing_costs(monkeypatch):
+    written = []
+    monkeypatch.setattr(plot.st, "write", written.append)
+    post_retrofit = pd.DataFrame(
+        {
+            "wall_cost_lower": [1e6, np.nan],
+            "wall_cost_upper": [3e6, 4e6],
+            "roof_cost_lower": [1e5, 0],
+            "roof_cost_upper": [5e5, 0],
+            "fabric_heat_loss_w_per_k": [100, 200],
+        }
+    )
+    expected_output = pd.DataFrame(
+        [[1.0, 7.0], [0.1, 0.5], [1.1, 7.5]],
+        index=["Wall", "Roof", "Total"],
+        columns=["Lowest Likely Cost [M€]", "Highest Likely Cost [M€]"],
+    )
+    plot.plot_retrofit_costs(post_retrofit)
+    assert len(written) == 1
+    assert_frame_equal(written[0], expected_output)
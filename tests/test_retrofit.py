@@ -0,0 +1,137 @@
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pandas.testing import assert_series_equal
+
+from dea import retrofit
+
+
+def test_get_viable_buildings():
+    uvalues = np.array([0.13, 2.3] * 6, dtype="float32")
+    random_order = np.random.default_rng(42).permutation(len(uvalues))
+    output = retrofit._get_viable_buildings(
+        uvalues=uvalues,
+        threshold_uvalue=0.5,
+        percentage_selected=0.5,
+        random_order=random_order,
+    )
+    assert output.sum() == 3
+    assert not output[uvalues < 0.5].any()
+
+
+def test_estimate_cost_of_fabric_retrofits():
+    is_selected = np.array([False, True, False, False])
+    cost = 100
+    areas = np.array([100, 50, 100, 100], dtype="float32")
+    expected_output = np.array([0, 5000, 0, 0], dtype="float32")
+    output = retrofit._estimate_cost_of_fabric_retrofits(
+        is_selected=is_selected, cost=cost, areas=areas
+    )
+    assert_array_almost_equal(output, expected_output)
+
+
+def test_get_ber_rating():
+    energy_values = pd.Series([10, 25, 25.1, 300, 451, np.nan])
+    expected_output = pd.Series(
+        pd.Categorical(
+            ["A1", "A1", "A2", "D2", "G", np.nan],
+            categories=retrofit._BER_RATING_LABELS,
+        ),
+        name="energy_rating",
+    )
+    output = retrofit._get_ber_rating(energy_values)
+    assert_series_equal(output, expected_output)
+
+
+def test_get_ber_rating_breakdown():
+    energy_values = pd.Series([300, 500, 400, 10, 500])
+    expected_output = pd.Series(
+        [1, 1, 1, 2],
+        index=pd.CategoricalIndex(
+            ["A1", "D2", "F", "G"],
+            categories=retrofit._BER_RATING_LABELS,
+            name="energy_rating",
+        ),
+    )
+    output = retrofit._get_ber_rating_breakdown(energy_values)
+    assert_series_equal(output, expected_output, check_names=False)
+
+
+def test_calculate_fabric_heat_loss_w_per_k():
+    """Output is equivalent to DEAP 4.2.0 example A"""
+    # roof, wall, floor, window, door
+    areas = np.array([[63, 85.7, 63, 29.6, 1.85]], dtype="float32")
+    uvalues = np.array([[0.11, 0.13, 0.14, 0.87, 1.5]], dtype="float32")
+    expected_output = np.array([68])
+    output = retrofit._calculate_fabric_heat_loss_w_per_k(
+        areas=areas, uvalues=uvalues, thermal_bridging_factor=0.05
+    )
+    assert_array_almost_equal(output.round(), expected_output)
+
+
+def test_get_size_of_pre_vs_post_category():
+    pre_retrofit_size = pd.Series([2, 1], index=pd.Index([False, True]))
+    post_retrofit_size = pd.Series([3], index=pd.Index([True]))
+    expected_output = pd.DataFrame(
+        {
+            "is_viable_for_a_heat_pump": [False, True, True],
+            "category": ["Pre", "Pre", "Post"],
+            "total": [2, 1, 3],
+        }
+    )
+    output = retrofit._get_size_of_pre_vs_post_category(
+        pre_retrofit_size=pre_retrofit_size,
+        post_retrofit_size=post_retrofit_size,
+        column="is_viable_for_a_heat_pump",
+    )
+    assert_frame_equal(output, expected_output)
+
+
+def test_retrofit_buildings_matches_full_fabric_heat_loss_recalculation(monkeypatch):
+    monkeypatch.setattr(
+        retrofit.htuse, "calculate_heat_loss_per_year", lambda heat_loss: heat_loss
+    )
+    rng = np.random.default_rng(42)
+    buildings = pd.DataFrame(
+        {
+            column: rng.uniform(0, 3, size=1000).astype("float32")
+            for column in retrofit._FABRIC_AREA_COLUMNS
+            + retrofit._FABRIC_UVALUE_COLUMNS
+        }
+    ).pipe(retrofit.calculate_fabric_heat_loss)
+    selections = {
+        component: {
+            "uvalue": {"threshold": 0.5, "target": 0.2},
+            "percentage_selected": 0.5,
+            "cost": {"lower": 50, "upper": 300},
+        }
+        for component in ["wall", "roof", "window"]
+    }
+    expected_columns = [
+        "wall_uvalue",
+        "wall_cost_lower",
+        "wall_cost_upper",
+        "roof_uvalue",
+        "roof_cost_lower",
+        "roof_cost_upper",
+        "window_uvalue",
+        "window_cost_lower",
+        "window_cost_upper",
+        "fabric_heat_loss_w_per_k",
+        "fabric_heat_loss_kwh_per_y",
+    ]
+
+    output = retrofit.retrofit_buildings(buildings=buildings, selections=selections)
+
+    assert list(output.columns) == expected_columns
+    assert (
+        output["fabric_heat_loss_w_per_k"] < buildings["fabric_heat_loss_w_per_k"]
+    ).any()
+    post_retrofit_uvalues = ["wall_uvalue", "roof_uvalue", "window_uvalue"]
+    expected_heat_loss = retrofit.calculate_fabric_heat_loss(
+        buildings.assign(**output[post_retrofit_uvalues])
+    )["fabric_heat_loss_w_per_k"]
+    assert_array_almost_equal(
+        output["fabric_heat_loss_w_per_k"], expected_heat_loss, decimal=3
+    )